@@ -0,0 +1,40 @@
+# flake8: noqa
+from pytest import fixture
+import torch
+
+from catalyst.settings import IS_CUDA_AVAILABLE
+
+
+@fixture(scope="module")
+def cudnn_benchmark():
+    """Enables cuDNN benchmark for the module tests, restores the flag after."""
+    if not IS_CUDA_AVAILABLE:
+        yield
+        return
+
+    benchmark = torch.backends.cudnn.benchmark
+    torch.backends.cudnn.benchmark = True
+    try:
+        yield
+    finally:
+        torch.backends.cudnn.benchmark = benchmark
+
+
+@fixture(scope="module")
+def allow_tf32():
+    """Enables TF32 matmuls and convolutions for the module tests, restores the flags after.
+
+    TF32 is available since torch 1.7 and used on Ampere+ GPUs only.
+    """
+    matmul = getattr(torch.backends.cuda, "matmul", None)
+    if not IS_CUDA_AVAILABLE or matmul is None:
+        yield
+        return
+
+    cudnn = torch.backends.cudnn
+    flags = (matmul.allow_tf32, cudnn.allow_tf32)
+    matmul.allow_tf32, cudnn.allow_tf32 = True, True
+    try:
+        yield
+    finally:
+        matmul.allow_tf32, cudnn.allow_tf32 = flags
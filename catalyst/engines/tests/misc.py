@@ -1,6 +1,7 @@
 # flake8: noqa
 from collections.abc import Iterable
 from contextlib import suppress
+from functools import lru_cache
 import logging
 import numbers
 import warnings
@@ -213,6 +214,44 @@ class DummyDataset(Dataset):
         return x, y
 
 
+class TensorDatasetLoader:
+    """Loader over the whole ``dataset`` preloaded on the ``device`` once."""
+
+    def __init__(self, dataset: Dataset, batch_size: int, device: str):
+        """
+        Args:
+            dataset: map-style dataset with ``(features, targets)`` samples
+            batch_size: number of samples per batch
+            device: device to preload the dataset on
+        """
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.sampler = None
+
+        features, targets = zip(*(dataset[i] for i in range(len(dataset))))
+        features, targets = torch.stack(features), torch.stack(targets)
+        if torch.device(device).type == "cuda":
+            features, targets = features.pin_memory(), targets.pin_memory()
+        self.features = features.to(device, non_blocking=True)
+        self.targets = targets.to(device, non_blocking=True)
+
+    def __len__(self):
+        """
+        Returns:
+            number of batches
+        """
+        return (len(self.dataset) + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        """
+        Yields:
+            features and targets batch views
+        """
+        for start in range(0, len(self.dataset), self.batch_size):
+            end = start + self.batch_size
+            yield self.features[start:end], self.targets[start:end]
+
+
 @REGISTRY.add
 class DummyModel(nn.Module):
     """Docs."""
@@ -229,6 +268,18 @@ class DummyModel(nn.Module):
         return self.layers(batch)
 
 
+@lru_cache(maxsize=None)
+def _get_dummy_model_state_dict(in_features, out_features):
+    return DummyModel(in_features, out_features).state_dict()
+
+
+def make_dummy_model(in_features, out_features):
+    """DummyModel with the same initial weights for every call (and every device)."""
+    model = DummyModel(in_features, out_features)
+    model.load_state_dict(_get_dummy_model_state_dict(in_features, out_features))
+    return model
+
+
 class TwoBlobsDataset(Dataset):
     def __init__(self):
         """
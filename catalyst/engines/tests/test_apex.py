@@ -2,6 +2,7 @@
 
 from typing import Dict
 import logging
+import os
 from tempfile import TemporaryDirectory
 
 from pytest import mark
@@ -17,10 +18,11 @@ from catalyst.settings import IS_CUDA_AVAILABLE, NUM_CUDA_DEVICES, SETTINGS
 from .misc import (
     DeviceCheckCallback,
     DummyDataset,
-    DummyModel,
     LossMinimizationCallback,
+    make_dummy_model,
     ModuleTypeChecker,
     OPTTensorTypeChecker,
+    TensorDatasetLoader,
 )
 
 if SETTINGS.apex_required:
@@ -28,6 +30,14 @@ if SETTINGS.apex_required:
 
 logger = logging.getLogger(__name__)
 
+# smoke mode: checks the code path (devices, tensor types) without the convergence
+PYTEST_FAST = os.environ.get("PYTEST_FAST", "0") == "1"
+NUM_EPOCHS = 1 if PYTEST_FAST else 3
+NUM_RECORDS = 4 if PYTEST_FAST else 6
+
+# no TF32 here: O0 is the pure fp32 baseline, O2/O3 matmuls run in fp16 anyway
+pytestmark = mark.usefixtures("cudnn_benchmark")
+
 
 OPT_LEVELS = (
     "O0",
@@ -68,15 +78,15 @@ class CustomRunner(IRunner):
         return ["train"]
 
     def get_stage_len(self, stage: str) -> int:
-        return 3
+        return NUM_EPOCHS
 
     def get_loaders(self, stage: str) -> "OrderedDict[str, DataLoader]":
-        dataset = DummyDataset(6)
-        loader = DataLoader(dataset, batch_size=4)
+        dataset = DummyDataset(NUM_RECORDS)
+        loader = TensorDatasetLoader(dataset, batch_size=4, device=self._device)
         return {"train": loader, "valid": loader}
 
     def get_model(self, stage: str):
-        return DummyModel(4, 2)
+        return make_dummy_model(4, 2)
 
     def get_criterion(self, stage: str):
         return torch.nn.MSELoss()
@@ -108,7 +118,7 @@ def train_from_runner(device, opt_level):
 
 def train_from_config(device, opt_level):
     with TemporaryDirectory() as logdir:
-        dataset = DummyDataset(6)
+        dataset = DummyDataset(NUM_RECORDS)
         runner = SupervisedConfigRunner(
             config={
                 "args": {"logdir": logdir},
@@ -121,7 +131,7 @@ def train_from_config(device, opt_level):
                 "args": {"logdir": logdir},
                 "stages": {
                     "stage1": {
-                        "num_epochs": 10,
+                        "num_epochs": 1 if PYTEST_FAST else 10,
                         "criterion": {"_target_": "MSELoss"},
                         "optimizer": {"_target_": "Adam", "lr": 1e-3},
                         "loaders": {"batch_size": 4, "num_workers": 0},
@@ -162,18 +172,18 @@ def train_from_config(device, opt_level):
 @mark.skipif(
     not IS_CUDA_AVAILABLE or not SETTINGS.apex_required, reason="CUDA devices is not available"
 )
-def test_apex_with_devices():
+@mark.parametrize("opt_level", OPT_LEVELS)
+def test_apex_with_devices(opt_level):
     to_check_devices = [f"cuda:{i}" for i in range(NUM_CUDA_DEVICES)]
     for device in to_check_devices:
-        for level in OPT_LEVELS:
-            train_from_runner(device, level)
+        train_from_runner(device, opt_level)
 
 
 @mark.skipif(
     not IS_CUDA_AVAILABLE or not SETTINGS.apex_required, reason="CUDA devices is not available"
 )
-def test_config_apex_with_devices():
+@mark.parametrize("opt_level", OPT_LEVELS)
+def test_config_apex_with_devices(opt_level):
     to_check_devices = [f"cuda:{i}" for i in range(NUM_CUDA_DEVICES)]
     for device in to_check_devices:
-        for level in OPT_LEVELS:
-            train_from_config(device, level)
+        train_from_config(device, opt_level)
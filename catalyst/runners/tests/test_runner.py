@@ -4,6 +4,7 @@ import torch
 from torch import nn, Tensor
 from torch.utils.data import DataLoader, Dataset
 
+from catalyst.core.callback import Callback, CallbackOrder
 from catalyst.core.runner import RunnerException
 from catalyst.dl import SupervisedRunner
 
@@ -58,3 +59,36 @@ def test_cathing_empty_loader() -> None:
         run_train_with_empty_loader()
     except RunnerException:
         pass
+
+
+class GradModeCallback(Callback):
+    """
+    Collects autograd mode per loader.
+    """
+
+    def __init__(self):
+        super().__init__(order=CallbackOrder.internal)
+        self.grad_enabled = {}
+
+    def on_batch_end(self, runner) -> None:
+        self.grad_enabled.setdefault(runner.loader_key, set()).add(torch.is_grad_enabled())
+
+
+def test_no_grad_on_valid_loader() -> None:
+    """
+    We expect autograd to be disabled for the non-train loaders.
+    """
+    dataset = DummyDataset()
+    model = nn.Linear(in_features=dataset.features_dim, out_features=dataset.out_dim)
+    loader = DataLoader(dataset=dataset, batch_size=2)
+    callback = GradModeCallback()
+    runner = SupervisedRunner()
+    runner.train(
+        loaders={"train": loader, "valid": loader},
+        model=model,
+        num_epochs=1,
+        criterion=nn.BCEWithLogitsLoss(),
+        optimizer=torch.optim.Adam(model.parameters()),
+        callbacks=[callback],
+    )
+    assert callback.grad_enabled == {"train": {True}, "valid": {False}}
@@ -3,52 +3,123 @@
 import os
 from tempfile import TemporaryDirectory
 
-from pytest import mark
+from pytest import fixture, mark
 import torch
 from torch import nn, optim
 from torch.nn import functional as F
-from torch.utils.data import DataLoader
+from torch.utils.data import DataLoader, TensorDataset
 
 from catalyst import dl, metrics
 from catalyst.contrib.datasets import MNIST
-from catalyst.data.transforms import ToTensor
+from catalyst.data import ILoaderWrapper
 from catalyst.settings import IS_CUDA_AVAILABLE, NUM_CUDA_DEVICES
+from catalyst.utils.torch import any2device
 
 LOG_SCALE_MAX = 2
 LOG_SCALE_MIN = -10
+LOSS_KEYS = ("loss_ae", "loss_kld", "loss")
 
+pytestmark = mark.usefixtures("cudnn_benchmark", "allow_tf32")
 
-def normal_sample(loc, log_scale):
-    scale = torch.exp(0.5 * log_scale)
-    return loc + scale * torch.randn_like(scale)
+
+@torch.jit.script
+def normal_sample(loc: torch.Tensor, log_scale: torch.Tensor) -> torch.Tensor:
+    scale = log_scale.mul(0.5).exp_()
+    return loc.addcmul(scale, torch.randn_like(scale))
+
+
+@torch.jit.script
+def kld_loss(loc: torch.Tensor, log_scale: torch.Tensor) -> torch.Tensor:
+    return (-0.5 * torch.sum(1 + log_scale - loc.pow(2) - log_scale.exp(), dim=1)).mean()
+
+
+class DeviceAdditiveValueMetric(metrics.IMetric):
+    """Mean of the input tensors, accumulated on the device to sync only on ``compute``."""
+
+    def __init__(self, device):
+        super().__init__(compute_on_call=False)
+        self.device = device
+        self.reset()
+
+    def reset(self):
+        self.value_sum = torch.zeros((), device=self.device)
+        self.num_samples = 0
+
+    def update(self, value, num_samples):
+        self.value_sum = self.value_sum + value.detach() * num_samples
+        self.num_samples += num_samples
+
+    def compute(self):
+        return self.value_sum / self.num_samples
+
+
+def _record_stream(value, stream):
+    if isinstance(value, (tuple, list)):
+        for v in value:
+            _record_stream(v, stream)
+    elif torch.is_tensor(value):
+        value.record_stream(stream)
+
+
+class CUDAPrefetchLoader(ILoaderWrapper):
+    """Copies the next batch to the ``device`` on a side CUDA stream,
+    while the current one is processed on the default stream.
+    """
+
+    def __init__(self, loader, device):
+        super().__init__(loader)
+        self.device = torch.device(device)
+
+    def __iter__(self):
+        if self.device.type != "cuda":
+            return iter(self.origin)
+        return self._prefetch()
+
+    def _prefetch(self):
+        stream = torch.cuda.Stream(device=self.device)
+        batch, first = None, True
+        for next_batch in self.origin:
+            with torch.cuda.stream(stream):
+                next_batch = any2device(next_batch, self.device)
+            if not first:
+                yield batch
+            first = False
+            current_stream = torch.cuda.current_stream(self.device)
+            current_stream.wait_stream(stream)
+            # the caching allocator should not reuse batch memory until the compute is done
+            _record_stream(next_batch, current_stream)
+            batch = next_batch
+        if not first:
+            yield batch
 
 
 class VAE(nn.Module):
     def __init__(self, in_features, hid_features):
         super().__init__()
         self.hid_features = hid_features
+        self.log_scale_min = LOG_SCALE_MIN
+        self.log_scale_max = LOG_SCALE_MAX
         self.encoder = nn.Linear(in_features, hid_features * 2)
         self.decoder = nn.Sequential(nn.Linear(hid_features, in_features), nn.Sigmoid())
 
-    def forward(self, x, deterministic=False):
+    def forward(self, x, deterministic: bool = False):
         z = self.encoder(x)
-        bs, z_dim = z.shape
 
-        loc, log_scale = z[:, : z_dim // 2], z[:, z_dim // 2 :]
-        log_scale = torch.clamp(log_scale, LOG_SCALE_MIN, LOG_SCALE_MAX)
+        loc, log_scale = z.chunk(2, dim=1)
+        log_scale = torch.clamp(log_scale, self.log_scale_min, self.log_scale_max)
 
         z_ = loc if deterministic else normal_sample(loc, log_scale)
-        z_ = z_.view(bs, -1)
         x_ = self.decoder(z_)
 
         return x_, loc, log_scale
 
 
 class CustomRunner(dl.IRunner):
-    def __init__(self, logdir, device):
+    def __init__(self, logdir, device, dataset):
         super().__init__()
         self._logdir = logdir
         self._device = device
+        self._dataset = dataset
 
     def get_engine(self):
         return dl.DeviceEngine(self._device)
@@ -68,18 +139,19 @@ class CustomRunner(dl.IRunner):
         return 1
 
     def get_loaders(self, stage: str):
+        pin_memory = self._device.startswith("cuda")
         loaders = {
-            "train": DataLoader(
-                MNIST(os.getcwd(), train=False, download=True, transform=ToTensor()), batch_size=32
-            ),
-            "valid": DataLoader(
-                MNIST(os.getcwd(), train=False, download=True, transform=ToTensor()), batch_size=32
-            ),
+            "train": DataLoader(self._dataset, batch_size=32, pin_memory=pin_memory),
+            "valid": DataLoader(self._dataset, batch_size=32, pin_memory=pin_memory),
+        }
+        loaders = {
+            key: CUDAPrefetchLoader(loader, device=self._device)
+            for key, loader in loaders.items()
         }
         return loaders
 
     def get_model(self, stage: str):
-        model = self.model if self.model is not None else VAE(28 * 28, 64)
+        model = self.model if self.model is not None else torch.jit.script(VAE(28 * 28, 64))
         return model
 
     def get_optimizer(self, stage: str, model):
@@ -95,10 +167,8 @@ class CustomRunner(dl.IRunner):
 
     def on_loader_start(self, runner):
         super().on_loader_start(runner)
-        self.meters = {
-            key: metrics.AdditiveValueMetric(compute_on_call=False)
-            for key in ["loss_ae", "loss_kld", "loss"]
-        }
+        # all the losses are tracked with one meter to sync them at once
+        self.meter = DeviceAdditiveValueMetric(self.device)
 
     def handle_batch(self, batch):
         x, _ = batch
@@ -106,42 +176,49 @@ class CustomRunner(dl.IRunner):
         x_, loc, log_scale = self.model(x, deterministic=not self.is_train_loader)
 
         loss_ae = F.mse_loss(x_, x)
-        loss_kld = (-0.5 * torch.sum(1 + log_scale - loc.pow(2) - log_scale.exp(), dim=1)).mean()
+        loss_kld = kld_loss(loc, log_scale)
         loss = loss_ae + loss_kld * 0.01
 
         self.batch_metrics = {"loss_ae": loss_ae, "loss_kld": loss_kld, "loss": loss}
-        for key in ["loss_ae", "loss_kld", "loss"]:
-            self.meters[key].update(self.batch_metrics[key].item(), self.batch_size)
+        self.meter.update(torch.stack([loss_ae, loss_kld, loss]), self.batch_size)
 
     def on_loader_end(self, runner):
-        for key in ["loss_ae", "loss_kld", "loss"]:
-            self.loader_metrics[key] = self.meters[key].compute()[0]
+        for key, value in zip(LOSS_KEYS, self.meter.compute().tolist()):
+            self.loader_metrics[key] = value
         super().on_loader_end(runner)
 
     def predict_batch(self, batch):
-        random_latent_vectors = torch.randn(1, self.model.hid_features).to(self.device)
+        random_latent_vectors = torch.randn(1, self.model.hid_features, device=self.device)
         generated_images = self.model.decoder(random_latent_vectors).detach()
         return generated_images
 
 
-def train_experiment(device):
+def train_experiment(device, dataset):
     with TemporaryDirectory() as logdir:
-        runner = CustomRunner(logdir, device)
+        runner = CustomRunner(logdir, device, dataset)
         runner.run()
         runner.predict_batch(None)[0].cpu().numpy().reshape(28, 28)
 
 
-def test_finetune_on_cpu():
-    train_experiment("cpu")
+@fixture(scope="session")
+def mnist_dataset():
+    # preloaded in [0; 1] range once, the same as ``ToTensor`` gives per sample
+    dataset = MNIST(os.getcwd(), train=False, download=True)
+    images = dataset.data.float().div_(255.0).unsqueeze_(1)
+    return TensorDataset(images, dataset.targets)
+
+
+def test_finetune_on_cpu(mnist_dataset):
+    train_experiment("cpu", mnist_dataset)
 
 
 @mark.skipif(not IS_CUDA_AVAILABLE, reason="CUDA device is not available")
-def test_finetune_on_cuda():
-    train_experiment("cuda:0")
+def test_finetune_on_cuda(mnist_dataset):
+    train_experiment("cuda:0", mnist_dataset)
 
 
 @mark.skipif(
     not IS_CUDA_AVAILABLE and NUM_CUDA_DEVICES < 2, reason="Number of CUDA devices is less than 2",
 )
-def test_finetune_on_cuda_device():
-    train_experiment("cuda:1")
+def test_finetune_on_cuda_device(mnist_dataset):
+    train_experiment("cuda:1", mnist_dataset)